@@ -1,5 +1,18 @@
 #!/usr/bin/env python3
 import functools
+import mmap
+import sys
+import timeit
+import numpy
+from typing import Dict, Iterator, List
+
+# The number of bytes of the manifest that are parsed at once in batch mode
+BATCH_CHUNK_SIZE = 64 * 1024 * 1024
+# Masses below this have their total fuel precomputed in a lookup table
+FUEL_TABLE_LIMIT = 1 << 20
+
+# The total fuel for every mass too large for the table that we've seen so far
+_large_mass_fuel_cache: Dict[int, int] = {}
 
 
 def part1():
@@ -56,9 +69,143 @@ def part2_alternate2():
     input_file.close()
 
 
+# Read the module masses from a manifest in chunks, so that memory stays bounded no matter how large the manifest is
+def read_module_chunks(path: str, chunk_size: int = BATCH_CHUNK_SIZE) -> Iterator[numpy.ndarray]:
+    with open(path, 'rb') as f:
+        # mmap can't map an empty file
+        if f.seek(0, 2) == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as manifest:
+            start = 0
+            while start < len(manifest):
+                end = min(start + chunk_size, len(manifest))
+                # Extend the chunk to the end of the line we're in, so we never split a number in half
+                if end < len(manifest):
+                    newline = manifest.find(b'\n', end - 1)
+                    end = len(manifest) if newline == -1 else newline + 1
+
+                masses = numpy.array(manifest[start:end].split(), dtype=numpy.int64)
+                start = end
+                # A chunk can be nothing but blank lines, which shouldn't be treated as any modules at all
+                if len(masses) > 0:
+                    yield masses
+
+
+# Find the fuel for all of the given modules, including the fuel needed for the fuel
+def compute_total_fuel(masses: numpy.ndarray) -> int:
+    total = 0
+    fuel = masses // 3 - 2
+    # Only keep iterating on the modules that still need more fuel; once an element stops changing, drop it
+    while True:
+        fuel = fuel[fuel > 0]
+        if fuel.size == 0:
+            break
+
+        total += int(fuel.sum())
+        fuel = fuel // 3 - 2
+
+    return total
+
+
+# Build a table of the total fuel (including the fuel for the fuel) needed for every mass below FUEL_TABLE_LIMIT.
+# This is only ever built once.
+@functools.lru_cache(maxsize=None)
+def make_fuel_table() -> numpy.ndarray:
+    table = numpy.zeros(FUEL_TABLE_LIMIT, dtype=numpy.int64)
+    # The fuel for any mass is less than a third of it, so we can fill the table in blocks of [n, 3n),
+    # knowing that all of the fuel masses in the block have already been filled in.
+    block_start = 0
+    while block_start < FUEL_TABLE_LIMIT:
+        block_end = min(max(block_start * 3, 9), FUEL_TABLE_LIMIT)
+        fuel = numpy.maximum(numpy.arange(block_start, block_end) // 3 - 2, 0)
+        table[block_start:block_end] = fuel + table[fuel]
+        block_start = block_end
+
+    return table
+
+
+# Get the total fuel needed for each of the given module masses
+def lookup_total_fuel(masses: numpy.ndarray) -> numpy.ndarray:
+    table = make_fuel_table()
+    masses = numpy.maximum(numpy.asarray(masses, dtype=numpy.int64), 0)
+    totals = numpy.zeros_like(masses)
+    too_large = masses >= FUEL_TABLE_LIMIT
+    totals[~too_large] = table[masses[~too_large]]
+    if not too_large.any():
+        return totals
+
+    # Each distinct large mass only has to be reduced once, ever; after that, its total is remembered
+    large_masses, large_mass_indices = numpy.unique(masses[too_large], return_inverse=True)
+    uncached = numpy.array([mass for mass in large_masses.tolist() if mass not in _large_mass_fuel_cache],
+                           dtype=numpy.int64)
+    if len(uncached) > 0:
+        # Reduce the masses until they fit into the table, and then the table has the rest of the answer
+        remaining = uncached.copy()
+        uncached_totals = numpy.zeros_like(uncached)
+        still_too_large = remaining >= FUEL_TABLE_LIMIT
+        while still_too_large.any():
+            fuel = remaining[still_too_large] // 3 - 2
+            uncached_totals[still_too_large] += fuel
+            remaining[still_too_large] = fuel
+            still_too_large = remaining >= FUEL_TABLE_LIMIT
+
+        uncached_totals += table[remaining]
+        _large_mass_fuel_cache.update(zip(uncached.tolist(), uncached_totals.tolist()))
+
+    large_totals = numpy.array([_large_mass_fuel_cache[mass] for mass in large_masses.tolist()], dtype=numpy.int64)
+    totals[too_large] = large_totals[large_mass_indices]
+
+    return totals
+
+
+def part2_lookup():
+    with open('../input.txt', 'r') as f:
+        modules = numpy.array([int(line) for line in f], dtype=numpy.int64)
+
+    print(int(lookup_total_fuel(modules).sum()))
+
+
+# Compare the lookup table against the loop used in part2, over the given masses
+def benchmark_part2_lookup(modules: List[int], number: int = 10) -> None:
+    def run_loop():
+        total = 0
+        for module in modules:
+            next_cost = module//3 - 2
+            while next_cost >= 0:
+                total += next_cost
+                next_cost = next_cost // 3 - 2
+
+        return total
+
+    module_array = numpy.array(modules, dtype=numpy.int64)
+    # Build the table outside of the timing, as it is a one time cost
+    make_fuel_table()
+    loop_time = timeit.timeit(run_loop, number=number) / number
+    lookup_time = timeit.timeit(lambda: lookup_total_fuel(module_array).sum(), number=number) / number
+    print(f"loop: {loop_time * 1000:.3f}ms, lookup: {lookup_time * 1000:.3f}ms ({len(modules)} modules)")
+
+
+def part1_batch(path: str = '../input.txt'):
+    print(sum(int((chunk // 3 - 2).sum()) for chunk in read_module_chunks(path)))
+
+
+def part2_batch(path: str = '../input.txt'):
+    print(sum(compute_total_fuel(chunk) for chunk in read_module_chunks(path)))
+
+
 if __name__ == '__main__':
+    if sys.argv[1:] == ['--benchmark']:
+        with open('../input.txt', 'r') as f:
+            benchmark_part2_lookup([int(line) for line in f] * 1000)
+        sys.exit(0)
+
     part1()
     part2()
     print("ALTERNATE SOLUTIONS:")
     part2_alternate()
     part2_alternate2()
+    part2_lookup()
+    print("BATCH SOLUTIONS:")
+    part1_batch()
+    part2_batch()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+import main
+
+
+class ReadModuleChunksTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def write_manifest(self, contents: bytes) -> None:
+        with open(self.path, 'wb') as f:
+            f.write(contents)
+
+    def read_masses(self, chunk_size: int):
+        return [int(mass) for chunk in main.read_module_chunks(self.path, chunk_size) for mass in chunk]
+
+    def test_chunk_boundaries(self):
+        self.write_manifest(b'12\n14\n1969\n100756\n')
+        for chunk_size in range(1, 32):
+            self.assertEqual(self.read_masses(chunk_size), [12, 14, 1969, 100756])
+
+    def test_trailing_blank_lines(self):
+        self.write_manifest(b'12\n14\n\n\n')
+        for chunk_size in range(1, 16):
+            self.assertEqual(self.read_masses(chunk_size), [12, 14])
+
+    def test_empty_file(self):
+        self.write_manifest(b'')
+        self.assertEqual(self.read_masses(4), [])
+
+
+class ComputeTotalFuelTest(unittest.TestCase):
+    def test_compute_total_fuel(self):
+        masses = main.numpy.array([14, 1969, 100756])
+        self.assertEqual(main.compute_total_fuel(masses), 2 + 966 + 50346)
+
+
+class LookupTotalFuelTest(unittest.TestCase):
+    @staticmethod
+    def loop_total_fuel(mass: int) -> int:
+        total = 0
+        next_cost = mass // 3 - 2
+        while next_cost > 0:
+            total += next_cost
+            next_cost = next_cost // 3 - 2
+
+        return total
+
+    def test_matches_loop(self):
+        masses = [0, 5, 14, 1969, 100756, main.FUEL_TABLE_LIMIT - 1, main.FUEL_TABLE_LIMIT, 10**7, 10**12, 10**12]
+        res = main.lookup_total_fuel(main.numpy.array(masses))
+        self.assertEqual(list(res), [self.loop_total_fuel(mass) for mass in masses])
+
+    def test_cached_masses(self):
+        masses = main.numpy.array([10**9, 10**10, 10**9])
+        first = main.lookup_total_fuel(masses)
+        second = main.lookup_total_fuel(masses)
+        self.assertEqual(list(first), list(second))
+        self.assertEqual(list(first), [self.loop_total_fuel(int(mass)) for mass in masses])
+
+
+if __name__ == '__main__':
+    unittest.main()
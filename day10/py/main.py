@@ -2,11 +2,20 @@ import sys
 import copy
 import fractions
 import math
-from typing import List, Iterable, Tuple
+import multiprocessing
+import numpy
+from multiprocessing import shared_memory
+from typing import List, Iterable, Optional, Tuple
 
 
 ASTEROID_CHAR = '#'
 SPACE_CHAR = '.'
+# The number of stations that are scored at once in part1_numpy, to keep the pairwise arrays to a reasonable size
+STATION_BLOCK_SIZE = 512
+
+# The shared asteroid array for each worker in part1_parallel, attached once when each worker starts
+_worker_shared_memory = None
+_worker_asteroids = None
 
 # Get the coordinates of all items in a line
 def get_items_in_slope(space_map: Tuple[Tuple[str]], start_row: int, start_col: int, rise: int, run: int) -> Tuple[Tuple[int, int]]:
@@ -109,6 +118,118 @@ def part1(input_space_map: List[List[str]]) -> Tuple[Tuple[int, int], int]:
     return best_pos, best_count
 
 
+# Get the coordinates of every asteroid on the map, in row major order
+def get_asteroid_positions(space_map: List[List[str]]) -> List[Tuple[int, int]]:
+    return [(i, j) for i, row in enumerate(space_map) for j, item in enumerate(row) if item == ASTEROID_CHAR]
+
+
+# Reduce an offset between two asteroids to the smallest offset in the same direction
+def normalize_direction(d_row: int, d_col: int) -> Tuple[int, int]:
+    divisor = math.gcd(d_row, d_col)
+
+    return d_row // divisor, d_col // divisor
+
+
+# Count the asteroids visible from the station. Only one asteroid can be seen in any given direction, so this is
+# the number of unique directions to the other asteroids.
+def count_visible_directions(asteroids: List[Tuple[int, int]], station_pos: Tuple[int, int]) -> int:
+    station_row, station_col = station_pos
+    directions = {
+        normalize_direction(row - station_row, col - station_col) for row, col in asteroids if (row, col) != station_pos
+    }
+
+    return len(directions)
+
+
+def part1_gcd(space_map: List[List[str]]) -> Tuple[Tuple[int, int], int]:
+    asteroids = get_asteroid_positions(space_map)
+    best_count = None
+    best_pos = None
+    for station_pos in asteroids:
+        visible_asteroid_count = count_visible_directions(asteroids, station_pos)
+        if best_count is None or visible_asteroid_count > best_count:
+            best_pos = station_pos
+            best_count = visible_asteroid_count
+
+    return best_pos, best_count
+
+
+# Count the asteroids visible from each of the stations in asteroids[start:end], using the same idea as
+# count_visible_directions, but for a whole block of stations at once
+def count_visible_numpy(asteroids: numpy.ndarray, start: int, end: int) -> numpy.ndarray:
+    stations = asteroids[start:end]
+    d_rows = asteroids[numpy.newaxis, :, 0] - stations[:, 0, numpy.newaxis]
+    d_cols = asteroids[numpy.newaxis, :, 1] - stations[:, 1, numpy.newaxis]
+    divisors = numpy.gcd(d_rows, d_cols)
+    is_self = divisors == 0
+    # Dividing the station's offset to itself by 1 leaves it at (0, 0), which is then excluded below
+    divisors[is_self] = 1
+    d_rows //= divisors
+    d_cols //= divisors
+
+    # Pack each direction into a single non-negative code, so that uniqueness only needs a sort
+    span = int(numpy.abs(asteroids).max()) + 1
+    codes = (d_rows + span) * (2 * span + 1) + (d_cols + span)
+    codes[is_self] = -1
+    codes.sort(axis=1)
+
+    # Every change in the sorted codes is a new direction; the station itself always sorts first
+    return numpy.count_nonzero(codes[:, 1:] != codes[:, :-1], axis=1)
+
+
+def part1_numpy(space_map: List[List[str]]) -> Tuple[Tuple[int, int], int]:
+    asteroids = numpy.array(get_asteroid_positions(space_map), dtype=numpy.int64)
+    if len(asteroids) == 0:
+        return None, None
+
+    counts = numpy.concatenate([
+        count_visible_numpy(asteroids, start, start + STATION_BLOCK_SIZE)
+        for start in range(0, len(asteroids), STATION_BLOCK_SIZE)
+    ])
+    # argmax takes the first of any ties, which matches the row major search in part1
+    best_index = int(numpy.argmax(counts))
+
+    return tuple(int(coord) for coord in asteroids[best_index]), int(counts[best_index])
+
+
+def _init_station_worker(shared_memory_name: str, shape: Tuple[int, int]) -> None:
+    global _worker_shared_memory, _worker_asteroids
+    _worker_shared_memory = shared_memory.SharedMemory(name=shared_memory_name)
+    _worker_asteroids = numpy.ndarray(shape, dtype=numpy.int64, buffer=_worker_shared_memory.buf)
+
+
+# Score a block of stations, returning the index of the best one and its count
+def _score_station_block(start: int) -> Tuple[int, int]:
+    counts = count_visible_numpy(_worker_asteroids, start, start + STATION_BLOCK_SIZE)
+    best_offset = int(numpy.argmax(counts))
+
+    return start + best_offset, int(counts[best_offset])
+
+
+def part1_parallel(space_map: List[List[str]], processes: Optional[int] = None) -> Tuple[Tuple[int, int], int]:
+    asteroids = numpy.array(get_asteroid_positions(space_map), dtype=numpy.int64)
+    if len(asteroids) == 0:
+        return None, None
+
+    shared_asteroids_memory = shared_memory.SharedMemory(create=True, size=asteroids.nbytes)
+    try:
+        shared_asteroids = numpy.ndarray(asteroids.shape, dtype=numpy.int64, buffer=shared_asteroids_memory.buf)
+        shared_asteroids[:] = asteroids
+        initargs = (shared_asteroids_memory.name, asteroids.shape)
+        with multiprocessing.Pool(processes, initializer=_init_station_worker, initargs=initargs) as pool:
+            block_results = pool.map(_score_station_block, range(0, len(asteroids), STATION_BLOCK_SIZE))
+        # The array must not outlive the memory backing it
+        del shared_asteroids
+    finally:
+        shared_asteroids_memory.close()
+        shared_asteroids_memory.unlink()
+
+    # Take the first of any ties, to match the row major search in part1
+    best_index, best_count = max(block_results, key=lambda result: (result[1], -result[0]))
+
+    return tuple(int(coord) for coord in asteroids[best_index]), best_count
+
+
 def part2(input_space_map: Tuple[Tuple[str, ...]], station_pos: Tuple[int, int]) -> int:
     space_map = copy.deepcopy(input_space_map)
     destroyed_asteroids = []
@@ -121,6 +242,40 @@ def part2(input_space_map: Tuple[Tuple[str, ...]], station_pos: Tuple[int, int])
     return asteroid[1] * 100 + asteroid[0]
 
 
+# Find the order that the laser will vaporize every asteroid in. Asteroids are grouped by their direction from the
+# station, and each group is sorted by distance; each rotation of the laser then takes the next asteroid from
+# every group, in clockwise order.
+def compute_vaporization_order(asteroids: List[Tuple[int, int]], station_pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+    station_row, station_col = station_pos
+    groups = {}
+    for row, col in asteroids:
+        if (row, col) == station_pos:
+            continue
+
+        direction = normalize_direction(row - station_row, col - station_col)
+        groups.setdefault(direction, []).append((row, col))
+
+    # The laser starts pointing up (negative rows) and turns clockwise
+    def clockwise_angle(direction: Tuple[int, int]) -> float:
+        d_row, d_col = direction
+        return math.atan2(d_col, -d_row) % (2 * math.pi)
+
+    distance = lambda pos: abs(pos[0] - station_row) + abs(pos[1] - station_col)
+    ordered_groups = [sorted(groups[direction], key=distance) for direction in sorted(groups, key=clockwise_angle)]
+
+    order = []
+    for rank in range(max((len(group) for group in ordered_groups), default=0)):
+        order += [group[rank] for group in ordered_groups if rank < len(group)]
+
+    return order
+
+
+def part2_sweep(space_map: List[List[str]], station_pos: Tuple[int, int]) -> int:
+    asteroid = compute_vaporization_order(get_asteroid_positions(space_map), station_pos)[199]
+
+    return asteroid[1] * 100 + asteroid[0]
+
+
 if __name__ == "__main__":
     if len(sys.argv) != 2:
         print("Usage: ./main.py in_file")
@@ -134,4 +289,8 @@ if __name__ == "__main__":
 
     best_pos, best_count = part1(inputs)
     print(best_count)
+    print(part1_gcd(inputs)[1])
+    print(part1_numpy(inputs)[1])
+    print(part1_parallel(inputs)[1])
     print(part2(inputs, best_pos))
+    print(part2_sweep(inputs, best_pos))
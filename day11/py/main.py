@@ -1,6 +1,9 @@
 import collections
+import struct
 import sys
-from typing import List, Tuple, Optional, DefaultDict
+import zlib
+import numpy
+from typing import Dict, List, Tuple, Optional
 
 # Halt indicates that the assembled program should terminate
 class Halt(Exception):
@@ -184,8 +187,110 @@ def execute_program(memory: Memory, program_inputs: List[int], initial_instructi
     return None, rel_base, outputs
 
 
+# A sparse canvas of the hull, made up of fixed size tiles that are only allocated once they are painted on
+class HullCanvas:
+    TILE_SIZE = 64
+
+    def __init__(self):
+        # Maps (tile_row, tile_col) to each tile's colors, and to a mask of which of its panels have been painted
+        self.tiles: Dict[Tuple[int, int], numpy.ndarray] = {}
+        self.painted: Dict[Tuple[int, int], numpy.ndarray] = {}
+        # The bounding box of all allocated tiles, in tile coordinates, as (min_row, min_col, max_row, max_col)
+        self.dirty_bounds: Optional[Tuple[int, int, int, int]] = None
+
+    def _locate(self, pos: Tuple[int, int]) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        tile_row, row = divmod(pos[0], HullCanvas.TILE_SIZE)
+        tile_col, col = divmod(pos[1], HullCanvas.TILE_SIZE)
+
+        return (tile_row, tile_col), (row, col)
+
+    def __getitem__(self, pos: Tuple[int, int]) -> int:
+        tile_key, offset = self._locate(pos)
+        tile = self.tiles.get(tile_key)
+        # Unallocated tiles have never been painted, so they must be black
+        if tile is None:
+            return 0
+
+        return int(tile[offset])
+
+    def __setitem__(self, pos: Tuple[int, int], color: int) -> None:
+        tile_key, offset = self._locate(pos)
+        if tile_key not in self.tiles:
+            self.tiles[tile_key] = numpy.zeros((HullCanvas.TILE_SIZE, HullCanvas.TILE_SIZE), dtype=numpy.uint8)
+            self.painted[tile_key] = numpy.zeros((HullCanvas.TILE_SIZE, HullCanvas.TILE_SIZE), dtype=bool)
+            self._expand_dirty_bounds(tile_key)
+
+        self.tiles[tile_key][offset] = color
+        self.painted[tile_key][offset] = True
+
+    def __len__(self) -> int:
+        return sum(int(numpy.count_nonzero(mask)) for mask in self.painted.values())
+
+    def _expand_dirty_bounds(self, tile_key: Tuple[int, int]) -> None:
+        tile_row, tile_col = tile_key
+        if self.dirty_bounds is None:
+            self.dirty_bounds = (tile_row, tile_col, tile_row, tile_col)
+            return
+
+        min_row, min_col, max_row, max_col = self.dirty_bounds
+        self.dirty_bounds = (min(min_row, tile_row), min(min_col, tile_col),
+                             max(max_row, tile_row), max(max_col, tile_col))
+
+    # Get the colors of the canvas as a single array, cropped down to the panels that were painted.
+    # Rows of the array correspond to the first coordinate, and columns to the second.
+    def to_array(self) -> numpy.ndarray:
+        if self.dirty_bounds is None:
+            return numpy.zeros((0, 0), dtype=numpy.uint8)
+
+        min_row, min_col, max_row, max_col = self.dirty_bounds
+        shape = ((max_row - min_row + 1) * HullCanvas.TILE_SIZE, (max_col - min_col + 1) * HullCanvas.TILE_SIZE)
+        colors = numpy.zeros(shape, dtype=numpy.uint8)
+        painted = numpy.zeros(shape, dtype=bool)
+        for (tile_row, tile_col), tile in self.tiles.items():
+            row = (tile_row - min_row) * HullCanvas.TILE_SIZE
+            col = (tile_col - min_col) * HullCanvas.TILE_SIZE
+            colors[row:row + HullCanvas.TILE_SIZE, col:col + HullCanvas.TILE_SIZE] = tile
+            painted[row:row + HullCanvas.TILE_SIZE, col:col + HullCanvas.TILE_SIZE] = self.painted[(tile_row, tile_col)]
+
+        painted_rows = numpy.flatnonzero(painted.any(axis=1))
+        painted_cols = numpy.flatnonzero(painted.any(axis=0))
+
+        return colors[painted_rows[0]:painted_rows[-1] + 1, painted_cols[0]:painted_cols[-1] + 1]
+
+
+# Render an array of colors as text, with white panels drawn as '#'
+def render_text(image: numpy.ndarray) -> str:
+    chars = numpy.where(image == 1, '#', ' ')
+
+    return '\n'.join(''.join(row) for row in chars)
+
+
+# Write an array of colors as a binary PBM. In PBM, a set bit is black, so white panels are the ones that are set.
+def write_pbm(image: numpy.ndarray, path: str) -> None:
+    height, width = image.shape
+    with open(path, 'wb') as f:
+        f.write(f'P4\n{width} {height}\n'.encode())
+        f.write(numpy.packbits(image == 1, axis=1).tobytes())
+
+
+# Write an array of colors as a grayscale PNG, with white panels drawn in black to match the PBM output
+def write_png(image: numpy.ndarray, path: str) -> None:
+    def make_chunk(chunk_type: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+    height, width = image.shape
+    pixels = numpy.where(image == 1, 0, 255).astype(numpy.uint8)
+    # Each scanline must be prefixed with its filter type, which is always 0 (no filtering) for us
+    scanlines = numpy.hstack((numpy.zeros((height, 1), dtype=numpy.uint8), pixels))
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(make_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)))
+        f.write(make_chunk(b'IDAT', zlib.compress(scanlines.tobytes())))
+        f.write(make_chunk(b'IEND', b''))
+
+
 # Trace all of the painted points that the robot makes
-def trace_paints(initial_memory_state: Memory, initial_color: int = 0) -> DefaultDict[Tuple[int, int], int]:
+def trace_paints(initial_memory_state: Memory, initial_color: int = 0) -> HullCanvas:
     ROBOT_DIRECTIONS = ['UP', 'RIGHT', 'DOWN', 'LEFT']
     ROBOT_DELTAS = {
         'UP': (0, 1),
@@ -194,7 +299,7 @@ def trace_paints(initial_memory_state: Memory, initial_color: int = 0) -> Defaul
         'LEFT': (1, 0)
     }
 
-    colors = collections.defaultdict(lambda: 0)
+    colors = HullCanvas()
     colors[(0, 0)] = initial_color
 
     # Represents an index in ROBOT_DIRECTIONS
@@ -231,21 +336,22 @@ def part1(inputs: Memory) -> int:
     return len(colors)
 
 
-def part2(inputs: Memory) -> None:
+def part2(inputs: Memory, out_file: Optional[str] = None) -> None:
     colors = trace_paints(inputs, 1)
-    max_x = max(coord[0] for coord in colors)
-    max_y = max(coord[1] for coord in colors)
-    min_x = min(coord[0] for coord in colors)
-    min_y = min(coord[1] for coord in colors)
-    for j in reversed(range(min_y, max_y+1)):
-        for i in reversed(range(min_x, max_x+1)):
-            print('#' if colors[(i, j)] == 1 else ' ', end='')
-        print('')
+    # The robot's "up" is along the second coordinate, so flip the canvas around to make the registration readable
+    image = colors.to_array()[::-1, ::-1].T
+    print(render_text(image))
+    if out_file is None:
+        return
+    elif out_file.endswith('.png'):
+        write_png(image, out_file)
+    else:
+        write_pbm(image, out_file)
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: ./main.py in_file")
+    if len(sys.argv) not in (2, 3):
+        print("Usage: ./main.py in_file [out_image]")
         sys.exit(1)
 
     memory = Memory()
@@ -254,4 +360,4 @@ if __name__ == "__main__":
             memory[i] = int(item)
 
     print(part1(memory))
-    part2(memory)
+    part2(memory, sys.argv[2] if len(sys.argv) == 3 else None)
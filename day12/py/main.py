@@ -4,6 +4,9 @@ import re
 import math
 import copy
 import functools
+import multiprocessing
+import numpy
+from typing import List, Tuple
 
 
 class Moon:
@@ -114,6 +117,86 @@ def part2(moons: Moon) -> int:
     return functools.reduce(lcm, counts.values())
 
 
+# The state of all of the moons, stored as (n_moons, 3) arrays of positions and velocities
+class MoonSystem:
+    def __init__(self, positions: numpy.ndarray, velocities: numpy.ndarray):
+        self.positions = positions
+        self.velocities = velocities
+
+    @classmethod
+    def from_moons(cls, moons: List[Moon]) -> 'MoonSystem':
+        positions = numpy.array([(moon.x, moon.y, moon.z) for moon in moons], dtype=numpy.int64)
+        velocities = numpy.array([(moon.x_velocity, moon.y_velocity, moon.z_velocity) for moon in moons],
+                                 dtype=numpy.int64)
+
+        return cls(positions, velocities)
+
+    # Apply gravity between every pair of moons, and then move them all
+    def step(self) -> None:
+        # [i, j] holds the direction that moon j pulls moon i in
+        self.velocities += numpy.sign(self.positions[numpy.newaxis] - self.positions[:, numpy.newaxis]).sum(axis=1)
+        self.positions += self.velocities
+
+    @property
+    def total_energy(self) -> int:
+        potential_energy = numpy.abs(self.positions).sum(axis=1)
+        kinetic_energy = numpy.abs(self.velocities).sum(axis=1)
+
+        return int((potential_energy * kinetic_energy).sum())
+
+
+def part1_numpy(moons: List[Moon]) -> int:
+    system = MoonSystem.from_moons(moons)
+    for i in range(1000):
+        system.step()
+
+    return system.total_energy
+
+
+def part2_numpy(moons: List[Moon]) -> int:
+    system = MoonSystem.from_moons(moons)
+    initial_positions = system.positions.copy()
+    initial_velocities = system.velocities.copy()
+    cycle_lengths = [None, None, None]
+    steps = 0
+    while None in cycle_lengths:
+        system.step()
+        steps += 1
+        # An axis has cycled when every moon is back to its starting position and velocity on that axis
+        returned = ((system.positions == initial_positions) & (system.velocities == initial_velocities)).all(axis=0)
+        for axis, axis_returned in enumerate(returned):
+            if axis_returned and cycle_lengths[axis] is None:
+                cycle_lengths[axis] = steps
+
+    return functools.reduce(lcm, cycle_lengths)
+
+
+# Find the number of steps until a single axis returns to its initial state. The axes don't affect each other, so
+# each one can be simulated on its own, as a MoonSystem with only one column.
+def find_axis_cycle(axis_state: Tuple[List[int], List[int]]) -> int:
+    positions, velocities = axis_state
+    system = MoonSystem(numpy.array(positions, dtype=numpy.int64)[:, numpy.newaxis],
+                        numpy.array(velocities, dtype=numpy.int64)[:, numpy.newaxis])
+    initial_positions = system.positions.copy()
+    initial_velocities = system.velocities.copy()
+    steps = 0
+    while True:
+        system.step()
+        steps += 1
+        if numpy.array_equal(system.positions, initial_positions) and \
+                numpy.array_equal(system.velocities, initial_velocities):
+            return steps
+
+
+def part2_parallel(moons: List[Moon]) -> int:
+    system = MoonSystem.from_moons(moons)
+    axis_states = [(system.positions[:, axis].tolist(), system.velocities[:, axis].tolist()) for axis in range(3)]
+    with multiprocessing.Pool(len(axis_states)) as pool:
+        cycle_lengths = pool.map(find_axis_cycle, axis_states)
+
+    return functools.reduce(lcm, cycle_lengths)
+
+
 if __name__ == '__main__':
     if len(sys.argv) != 2:
         print("Usage: ./main.py in_file")
@@ -124,3 +207,6 @@ if __name__ == '__main__':
 
     print(part1(copy.deepcopy(moons)))
     print(part2(copy.deepcopy(moons)))
+    print(part1_numpy(moons))
+    print(part2_numpy(moons))
+    print(part2_parallel(moons))
@@ -1,7 +1,11 @@
 import sys
 import math
+import fractions
+import numpy
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Tuple
+
+INT64_MAX = int(numpy.iinfo(numpy.int64).max)
 
 
 # Element is a node in a graph used to represent the dependencies amongst reactions (not the quantities themselves)
@@ -108,6 +112,223 @@ def find_ore_required_for_fuel_amount(fuel_amount: int, reactions: List[Reaction
     return num_ore_required
 
 
+# The reactions compiled into integer indexed lists, with elements in topological order: every element comes before
+# all of the elements it is made from, so the amount needed of an element is known by the time it is reached.
+class CompiledReactions:
+    def __init__(self, reactions: List[Reaction], fuel_element: Element):
+        producers = {reaction.output[0].name: reaction for reaction in reactions}
+
+        # Only the reactions that can lead to fuel matter
+        reachable = {fuel_element.name}
+        to_visit = [fuel_element.name]
+        while to_visit:
+            name = to_visit.pop()
+            if name == Element.ORE_ELEMENT:
+                continue
+
+            for input_element in producers[name].inputs:
+                if input_element.name not in reachable:
+                    reachable.add(input_element.name)
+                    to_visit.append(input_element.name)
+
+        # An element is ready once every reaction that consumes it has been placed
+        consumer_counts = {name: 0 for name in reachable}
+        for name in reachable - {Element.ORE_ELEMENT}:
+            for input_element in producers[name].inputs:
+                consumer_counts[input_element.name] += 1
+
+        self.names: List[str] = []
+        ready = [fuel_element.name]
+        while ready:
+            name = ready.pop()
+            self.names.append(name)
+            if name == Element.ORE_ELEMENT:
+                continue
+
+            for input_element in producers[name].inputs:
+                consumer_counts[input_element.name] -= 1
+                if consumer_counts[input_element.name] == 0:
+                    ready.append(input_element.name)
+
+        self.indices: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self.fuel_index = self.indices[fuel_element.name]
+        self.ore_index = self.indices[Element.ORE_ELEMENT]
+        # The quantity each reaction produces, and the (element index, quantity) pairs it consumes
+        self.output_quantities: List[int] = [0] * len(self.names)
+        self.reaction_inputs: List[List[Tuple[int, int]]] = [[] for _ in self.names]
+        for name, i in self.indices.items():
+            if i == self.ore_index:
+                continue
+
+            reaction = producers[name]
+            self.output_quantities[i] = reaction.output[1]
+            self.reaction_inputs[i] = [
+                (self.indices[element.name], count) for element, count in reaction.inputs.items()
+            ]
+
+    # Find the number of times each reaction must be run to make the given amount of fuel, as well as how much of
+    # each element is needed along the way
+    def run(self, fuel_amount: int) -> Tuple[List[int], List[int]]:
+        needed = [0] * len(self.names)
+        reaction_counts = [0] * len(self.names)
+        needed[self.fuel_index] = fuel_amount
+        for i, output_quantity in enumerate(self.output_quantities):
+            if i == self.ore_index or needed[i] == 0:
+                continue
+
+            # Ceiling division, without going through floats
+            reactions_required = -(-needed[i] // output_quantity)
+            reaction_counts[i] = reactions_required
+            for input_index, count in self.reaction_inputs[i]:
+                needed[input_index] += count * reactions_required
+
+        return needed, reaction_counts
+
+    def ore_for_fuel(self, fuel_amount: int) -> int:
+        needed, _ = self.run(fuel_amount)
+
+        return needed[self.ore_index]
+
+    # The least ORE that could ever be needed per fuel, if reactions could be run a fraction of a time.
+    # No amount of fuel can ever take less than this much ORE per fuel.
+    def ore_per_fuel_lower_bound(self) -> fractions.Fraction:
+        needed = [fractions.Fraction(0)] * len(self.names)
+        needed[self.fuel_index] = fractions.Fraction(1)
+        for i, output_quantity in enumerate(self.output_quantities):
+            if i == self.ore_index:
+                continue
+
+            reactions_required = needed[i] / output_quantity
+            for input_index, count in self.reaction_inputs[i]:
+                needed[input_index] += count * reactions_required
+
+        return needed[self.ore_index]
+
+    # Pick a dtype that can hold every amount needed to make the given fuel amounts. The amount needed of every element
+    # only grows with the amount of fuel, so the largest fuel amount needs the most of everything. If that doesn't fit
+    # in an int64, we fall back to Python ints, which are slower but can't overflow.
+    def _get_batch_dtype(self, fuel_amounts: List[int]) -> type:
+        if any(fuel_amount < 0 for fuel_amount in fuel_amounts):
+            raise ValueError('Fuel amounts cannot be negative')
+
+        needed, _ = self.run(max(fuel_amounts, default=0))
+
+        return numpy.int64 if max(needed) <= INT64_MAX else object
+
+    # The same as run, but for many fuel amounts at once. Row i of each result is element i, and column k is the
+    # k-th fuel amount.
+    def run_batch(self, fuel_amounts: Iterable[int]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        fuel_amounts = [int(fuel_amount) for fuel_amount in fuel_amounts]
+        dtype = self._get_batch_dtype(fuel_amounts)
+        needed = numpy.zeros((len(self.names), len(fuel_amounts)), dtype=dtype)
+        reaction_counts = numpy.zeros_like(needed)
+        needed[self.fuel_index] = numpy.array(fuel_amounts, dtype=dtype)
+        for i, output_quantity in enumerate(self.output_quantities):
+            if i == self.ore_index:
+                continue
+
+            reaction_counts[i] = -(-needed[i] // output_quantity)
+            for input_index, count in self.reaction_inputs[i]:
+                needed[input_index] += count * reaction_counts[i]
+
+        return needed, reaction_counts
+
+    def ore_for_fuel_batch(self, fuel_amounts: Iterable[int]) -> numpy.ndarray:
+        needed, _ = self.run_batch(fuel_amounts)
+
+        return needed[self.ore_index]
+
+    # Find the most fuel that can be made for each of the given ORE budgets, by searching for all of them at once
+    def max_fuel_batch(self, ore_budgets: Iterable[int]) -> numpy.ndarray:
+        ore_budgets = [int(ore_budget) for ore_budget in ore_budgets]
+        if any(ore_budget < 0 for ore_budget in ore_budgets):
+            raise ValueError('ORE budgets cannot be negative')
+
+        # Making any more fuel than this would take more ORE than the budget, even without any waste, so the search
+        # never has to go past it
+        ore_per_fuel = self.ore_per_fuel_lower_bound()
+        fuel_limits = [
+            ore_budget * ore_per_fuel.denominator // ore_per_fuel.numerator + 1 for ore_budget in ore_budgets
+        ]
+        # The search can briefly reach three times the limit, so make sure that fits too
+        dtype = numpy.int64 if max(fuel_limits, default=0) <= INT64_MAX // 3 else object
+        fuel_limits = numpy.array(fuel_limits, dtype=dtype)
+        ore_budgets = numpy.array(ore_budgets, dtype=dtype)
+
+        def can_make(fuel_amounts: numpy.ndarray) -> numpy.ndarray:
+            return (self.ore_for_fuel_batch(fuel_amounts) <= ore_budgets).astype(bool)
+
+        # As in find_max_fuel, this much fuel can always be made
+        low = ore_budgets // self.ore_for_fuel(1)
+        # Double the gap above low until it can't be made for every budget
+        high = low + 1
+        can_make_high = can_make(high)
+        while can_make_high.any():
+            gap = high - low
+            low = numpy.where(can_make_high, high, low)
+            high = numpy.where(can_make_high, numpy.minimum(high + 2 * gap, fuel_limits), high)
+            can_make_high = can_make(high)
+
+        # The answer for each budget is now in [low, high)
+        high -= 1
+        while (low < high).any():
+            fuel_amounts = (low + high + 1) // 2
+            can_make_mid = can_make(fuel_amounts)
+            low = numpy.where(can_make_mid, fuel_amounts, low)
+            high = numpy.where(can_make_mid, high, fuel_amounts - 1)
+
+        return low
+
+    # Get the amount of every intermediate chemical needed for each of the given fuel amounts
+    def bill_of_materials_batch(self, fuel_amounts: Iterable[int]) -> List[Dict[str, int]]:
+        needed, _ = self.run_batch(fuel_amounts)
+        intermediates = [
+            (i, name) for i, name in enumerate(self.names) if i not in (self.fuel_index, self.ore_index)
+        ]
+
+        return [{name: int(needed[i, k]) for i, name in intermediates} for k in range(needed.shape[1])]
+
+
+# Find the most fuel that can be made with the given amount of ORE.
+# ORE(fuel) is nearly linear, so we start from the estimate of ORE / ORE(1), refine it with secant steps through the
+# origin, and then only need a short exponential and binary search to find the exact answer.
+def find_max_fuel(compiled: CompiledReactions, ore_budget: int) -> int:
+    ore_per_fuel = compiled.ore_for_fuel(1)
+    if ore_per_fuel > ore_budget:
+        return 0
+
+    # Making fuel in bulk can only reuse surplus, never waste more, so this much fuel can always be made
+    best_fuel = ore_budget // ore_per_fuel
+    estimate = best_fuel
+    for _ in range(4):
+        ore_required = compiled.ore_for_fuel(estimate)
+        if ore_required <= ore_budget:
+            best_fuel = max(best_fuel, estimate)
+
+        next_estimate = estimate * ore_budget // ore_required
+        if next_estimate == estimate:
+            break
+        estimate = next_estimate
+
+    # Gallop upwards from the best amount we know can be made, until we overshoot
+    step = 1
+    while compiled.ore_for_fuel(best_fuel + step) <= ore_budget:
+        best_fuel += step
+        step *= 2
+
+    # The answer is now in [best_fuel, best_fuel + step)
+    low = best_fuel
+    high = best_fuel + step - 1
+    while low < high:
+        fuel_amount = (low + high + 1) // 2
+        if compiled.ore_for_fuel(fuel_amount) <= ore_budget:
+            low = fuel_amount
+        else:
+            high = fuel_amount - 1
+
+    return low
+
+
 def part1(reactions: List[Reaction], fuel_element: Element) -> int:
     return find_ore_required_for_fuel_amount(1, reactions, fuel_element)
 
@@ -131,6 +352,16 @@ def part2(reactions: List[Reaction], fuel_element: Element) -> int:
     return low - 1
 
 
+def part1_compiled(compiled: CompiledReactions) -> int:
+    return compiled.ore_for_fuel(1)
+
+
+def part2_compiled(compiled: CompiledReactions) -> int:
+    THRESHOLD = 1000000000000
+
+    return find_max_fuel(compiled, THRESHOLD)
+
+
 if __name__ == '__main__':
     if len(sys.argv) != 2:
         print("Usage: ./main.py in_file")
@@ -142,3 +373,7 @@ if __name__ == '__main__':
 
     print(part1(reactions, fuel_element))
     print(part2(reactions, fuel_element))
+
+    compiled = CompiledReactions(reactions, fuel_element)
+    print(part1_compiled(compiled))
+    print(part2_compiled(compiled))
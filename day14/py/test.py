@@ -0,0 +1,55 @@
+import unittest
+import main
+
+
+def compile_reactions(path: str) -> main.CompiledReactions:
+    with open(path) as f:
+        lines = f.read().rstrip('\n').split('\n')
+
+    return main.CompiledReactions(*main.parse_reaction_list(lines))
+
+
+class OreForFuelBatchTest(unittest.TestCase):
+    def test_matches_scalar(self):
+        compiled = compile_reactions('../sample3.txt')
+        fuel_amounts = [0, 1, 2, 17, 1000, 82892753]
+        res = compiled.ore_for_fuel_batch(fuel_amounts)
+        self.assertEqual(list(res), [compiled.ore_for_fuel(fuel_amount) for fuel_amount in fuel_amounts])
+
+    def test_large_targets_do_not_overflow(self):
+        compiled = compile_reactions('../input.txt')
+        fuel_amounts = [10**14, 10**15, 10**16]
+        res = compiled.ore_for_fuel_batch(fuel_amounts)
+        self.assertEqual(list(res), [compiled.ore_for_fuel(fuel_amount) for fuel_amount in fuel_amounts])
+
+    def test_negative_target(self):
+        compiled = compile_reactions('../sample1.txt')
+        self.assertRaises(ValueError, compiled.ore_for_fuel_batch, [-1])
+
+
+class MaxFuelBatchTest(unittest.TestCase):
+    def test_matches_scalar(self):
+        compiled = compile_reactions('../sample3.txt')
+        ore_budgets = [0, 1, 13312, 10**6, 10**12]
+        res = compiled.max_fuel_batch(ore_budgets)
+        self.assertEqual(list(res), [main.find_max_fuel(compiled, ore_budget) for ore_budget in ore_budgets])
+
+    def test_large_budgets(self):
+        compiled = compile_reactions('../input.txt')
+        ore_budgets = [10**12, 9 * 10**18, 10**30]
+        res = compiled.max_fuel_batch(ore_budgets)
+        self.assertEqual(list(res), [main.find_max_fuel(compiled, ore_budget) for ore_budget in ore_budgets])
+
+
+class BillOfMaterialsBatchTest(unittest.TestCase):
+    def test_bill_of_materials(self):
+        compiled = compile_reactions('../sample1.txt')
+        res = compiled.bill_of_materials_batch([1, 2])
+        self.assertEqual(res, [
+            {'A': 28, 'B': 1, 'C': 1, 'D': 1, 'E': 1},
+            {'A': 56, 'B': 2, 'C': 2, 'D': 2, 'E': 2},
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
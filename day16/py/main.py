@@ -1,5 +1,7 @@
+import itertools
 import sys
 import math
+import numpy
 from typing import Tuple, List
 
 BASE_PATTERN = (0, 1, 0, -1)
@@ -33,6 +35,13 @@ def generate_second_half(input_num: str) -> str:
     return ''.join(input_list)
 
 
+# The same as generate_second_half, but on an array of digits. Past the halfway point, every pattern is zeroes
+# followed by ones, so each output digit is just the sum of the digits from that point onwards.
+def generate_second_half_numpy(digits: numpy.ndarray) -> numpy.ndarray:
+    # The sums can't exceed 9 * len(digits), so int32 is plenty as long as there are fewer than ~200 million digits
+    return (numpy.cumsum(digits[::-1], dtype=numpy.int32)[::-1] % 10).astype(numpy.int8)
+
+
 def run_pattern_round(input_num: str, offset: int) -> str:
     res = ''
     for i in range(offset, len(input_num)//2):
@@ -60,6 +69,84 @@ def generate_all_pattern_rounds(input_num: str, offset: int = 0) -> str:
     return res
 
 
+# Run a single phase using prefix sums. The pattern for output digit i is runs of i + 1 ones and negative ones, so each
+# output digit is a sum of differences of the prefix sums over those runs; this is O(n/i) per digit, rather than O(n).
+def run_phase(digits: List[int]) -> List[int]:
+    prefix_sums = [0, *itertools.accumulate(digits)]
+    num_digits = len(digits)
+    res = []
+    for i in range(num_digits):
+        run_length = i + 1
+        total = 0
+        # The pattern is shifted left by one, so the first run of ones starts at i
+        for start in range(i, num_digits, 4 * run_length):
+            total += prefix_sums[min(start + run_length, num_digits)] - prefix_sums[start]
+            negative_start = start + 2 * run_length
+            if negative_start < num_digits:
+                total -= prefix_sums[min(negative_start + run_length, num_digits)] - prefix_sums[negative_start]
+
+        res.append(abs(total) % 10)
+
+    return res
+
+
+def part1_prefix_sum(input_num: str) -> str:
+    digits = [int(digit) for digit in input_num]
+    for i in range(100):
+        digits = run_phase(digits)
+
+    return ''.join(str(digit) for digit in digits[:8])
+
+
+# A signal made of a base signal repeated many times, without ever building the whole thing
+class RepeatedSignal:
+    def __init__(self, base: str, repeats: int):
+        self.base = numpy.frombuffer(base.encode(), dtype=numpy.uint8).astype(numpy.int8) - ord('0')
+        self.repeats = repeats
+
+    def __len__(self) -> int:
+        return len(self.base) * self.repeats
+
+    def __getitem__(self, i: int) -> int:
+        if not 0 <= i < len(self):
+            raise IndexError('signal index out of range')
+
+        return int(self.base[i % len(self.base)])
+
+    # Build only the digits from the offset to the end of the signal
+    def tail(self, offset: int, dtype: numpy.dtype = numpy.int8) -> numpy.ndarray:
+        # Rotating the base so it starts where the offset lands lets resize do the repeating for us
+        rotated = numpy.roll(self.base, -(offset % len(self.base)))
+
+        return numpy.resize(rotated, max(len(self) - offset, 0)).astype(dtype)
+
+
+# Find C(k + m, m) mod p for every k in ks, with Lucas' theorem: the binomial is the product of the binomials of
+# each pair of base p digits of k + m and m
+def binomial_mod_prime(ks: numpy.ndarray, m: int, p: int) -> numpy.ndarray:
+    small_binomials = numpy.array([[math.comb(n, r) % p for r in range(p)] for n in range(p)], dtype=numpy.int64)
+    ns = ks + m
+    res = numpy.ones_like(ns)
+    # Digits past the top of m are paired with zeroes, which always contribute C(n, 0) = 1
+    while m > 0:
+        res = res * small_binomials[ns % p, m % p] % p
+        ns //= p
+        m //= p
+
+    return res
+
+
+# After the given number of phases, each digit in the second half is sum(C(k + phases - 1, phases - 1) * x[k]) over
+# every digit x[k] from it onwards. Only the coefficients mod 10 matter, which we find mod 2 and mod 5 and combine.
+def binomial_coefficients_mod_10(count: int, phases: int) -> numpy.ndarray:
+    ks = numpy.arange(count, dtype=numpy.int64)
+    mod_2 = binomial_mod_prime(ks, phases - 1, 2)
+    mod_5 = binomial_mod_prime(ks, phases - 1, 5)
+
+    # 5 is 1 mod 2 and 0 mod 5, and 6 is 0 mod 2 and 1 mod 5, so this satisfies both congruences
+    return (5 * mod_2 + 6 * mod_5) % 10
+
+
 def part1(input_num: str) -> str:
     return generate_all_pattern_rounds(input_num)[:8]
 
@@ -69,6 +156,33 @@ def part2(input_num: str) -> str:
     return generate_all_pattern_rounds(input_num * 10000, offset)[:8]
 
 
+def part2_numpy(input_num: str) -> str:
+    offset = int(input_num[:7])
+    signal = RepeatedSignal(input_num, 10000)
+    if offset < len(signal) // 2:
+        raise ValueError('The message offset must be in the second half of the signal')
+
+    digits = signal.tail(offset)
+    for i in range(100):
+        digits = generate_second_half_numpy(digits)
+
+    return ''.join(str(digit) for digit in digits[:8])
+
+
+def part2_binomial(input_num: str) -> str:
+    offset = int(input_num[:7])
+    signal = RepeatedSignal(input_num, 10000)
+    if offset < len(signal) // 2:
+        raise ValueError('The message offset must be in the second half of the signal')
+
+    digits = signal.tail(offset, numpy.int64)
+    coefficients = binomial_coefficients_mod_10(len(digits), 100)
+    # Only the eight digits of the message are needed, so they can be found directly without running every phase
+    message = [int(numpy.dot(coefficients[:len(digits) - i], digits[i:]) % 10) for i in range(8)]
+
+    return ''.join(str(digit) for digit in message)
+
+
 if __name__ == '__main__':
     if len(sys.argv) != 2:
         print("Usage: ./main.py in_file")
@@ -79,3 +193,6 @@ if __name__ == '__main__':
 
     print(part1(input_num))
     print(part2(input_num))
+    print(part1_prefix_sum(input_num))
+    print(part2_numpy(input_num))
+    print(part2_binomial(input_num))
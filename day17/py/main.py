@@ -1,10 +1,9 @@
 import collections
 import enum
 import itertools
-import re
 import sys
 import networkx
-from typing import Dict, List, Tuple, Optional
+from typing import List, Tuple, Optional
 
 
 # Halt indicates that the assembled program should terminate
@@ -201,6 +200,20 @@ class TurnDirection(enum.Enum):
     def __str__(self):
         return self.value
 
+    # Turns are encoded as negative integers in a path, so they can never be confused with a forward count
+    @property
+    def token(self) -> int:
+        return -1 if self == TurnDirection.LEFT else -2
+
+    @staticmethod
+    def from_token(token: int) -> 'TurnDirection':
+        if token == -1:
+            return TurnDirection.LEFT
+        elif token == -2:
+            return TurnDirection.RIGHT
+        else:
+            raise ValueError(f"Invalid turn token {token}")
+
 
 class Direction(enum.IntEnum):
     NORTH = 1
@@ -294,24 +307,27 @@ def build_graph_from_program(initial_memory_state: Memory) -> (networkx.Graph, T
 
 
 # Make a path by being as greedy as possible - go forward until we can't anymore.
-def make_greedy_path(scaffold_graph: networkx.Graph, start_pos: Tuple[int, int]) -> str:
-    path_components = []
+# The path is returned as a list of integer tokens; positive tokens are forward counts, and negative tokens are turns
+# (see TurnDirection.token)
+def trace_greedy_path(scaffold_graph: networkx.Graph, start_pos: Tuple[int, int]) -> List[int]:
+    path_tokens = []
     forward_count = 0
     robot_direction = Direction.NORTH
+    # Keep a count of the nodes we have left to visit, rather than comparing against the set of all nodes every step
+    num_nodes = scaffold_graph.number_of_nodes()
     visited = set()
     node_cursor = start_pos
-    while visited != set(scaffold_graph.nodes):
+    while len(visited) < num_nodes:
         next_pos = robot_direction.move_coords_in_direction(node_cursor)
         if next_pos not in scaffold_graph:
-            possible_points = set(scaffold_graph.neighbors(node_cursor)) - set(visited)
-            next_pos = min(possible_points, key=lambda x: (x[0], x[1]))
+            next_pos = min(neighbor for neighbor in scaffold_graph.neighbors(node_cursor) if neighbor not in visited)
             new_direction = Direction.get_direction_to_coordinate(node_cursor, next_pos)
             turns_needed = robot_direction.get_turn_to_direction(new_direction)
             robot_direction = new_direction
 
             if forward_count > 0:
-                path_components.append(str(forward_count))
-            path_components += [str(turn) for turn in turns_needed]
+                path_tokens.append(forward_count)
+            path_tokens += [turn.token for turn in turns_needed]
             forward_count = 0
 
         visited.add(node_cursor)
@@ -319,125 +335,58 @@ def make_greedy_path(scaffold_graph: networkx.Graph, start_pos: Tuple[int, int])
         node_cursor = next_pos
         forward_count += 1
     if forward_count > 0:
-        path_components.append(str(forward_count))
+        path_tokens.append(forward_count)
 
-    return ','.join(path_components)
-
-
-# Find a component of the string that occurs more than once, starting at the given position and checking forwards/backwards
-# based on the given offset
-def find_path_component(path: str, start: int, offset: int) -> str:
-    component = path[start:offset] if offset > 0 else path[start + offset:]
-    if (offset > 0 and component[-1] != ',') or (offset < 0 and component[0] != ','):
-        return None
-    elif path.count(component) == 1:
-        return None
+    return path_tokens
 
-    return component.strip(',')
 
+# Convert a list of path tokens into the comma separated form the robot expects
+def format_path_tokens(path_tokens: List[int]) -> str:
+    return ','.join(str(TurnDirection.from_token(token)) if token < 0 else str(token) for token in path_tokens)
 
-# Get all substrings of s without the given component
-def get_substrings_without_str(s: str, component: str) -> str:
-    locations = [(match.start(), match.end()) for match in re.finditer(re.escape(component), s)]
-    locations.insert(0, (None, None))
-    locations.append((None, None))
 
-    substrings = [s[location1[1]:location2[0]].strip(',') for location1, location2 in zip(locations, locations[1:])]
-
-    return [substring for substring in substrings if len(substring) > 0]
-
-
-# If a path string is a duplicate itself, strip it down to its base component
-def dedup_path_string(s: str) -> str:
-    normalized_s = s
-    # Need to join the two components with a comma so that we actually can spot the repetition (the string may not have a trailing comma)
-    if s[-1] != ',':
-        normalized_s = s + ','
+# Split the path into at most three functions, each short enough to fit in the robot's memory, such that the whole path
+# is some sequence of them. Returns the functions, and the indices of the functions in the order they're called.
+def compress_path(path_tokens: List[int]) -> Tuple[List[List[int]], List[int]]:
+    MAX_LENGTH = 20
+    MAX_FUNCTIONS = 3
+    # Each call in the main routine takes a letter and a comma, less the trailing comma
+    MAX_CALLS = (MAX_LENGTH + 1) // 2
+
+    def find_functions(
+            start: int, functions: List[List[int]], calls: List[int]) -> Optional[Tuple[List[List[int]], List[int]]]:
+        if start == len(path_tokens):
+            return functions, calls
+        elif len(calls) == MAX_CALLS:
+            return None
 
-    # Find if the string is only composed of a portion of itself
-    repeat_index = (normalized_s + normalized_s).find(normalized_s, 1, -1)
-    if repeat_index == -1:
-        return s
-    else:
-        return s[:repeat_index].rstrip(',')
+        # Try to continue the path with a function we already have
+        for i, function in enumerate(functions):
+            if path_tokens[start:start + len(function)] == function:
+                res = find_functions(start + len(function), functions, calls + [i])
+                if res is not None:
+                    return res
 
+        if len(functions) == MAX_FUNCTIONS:
+            return None
 
-# Given the two other components, see if there's one final component left in the string
-def get_last_path_component(path: str, component1: str, component2: str) -> Optional[str]:
-    path_without_component1 = get_substrings_without_str(path, component1)
-    # Get the path without component 1 or component 2
-    remaining_comonents = []
-    for substring in path_without_component1:
-        remaining_comonents += get_substrings_without_str(substring, component2)
+        # Otherwise, try every new function that starts here and still fits
+        for end in range(start + 1, len(path_tokens) + 1):
+            function = path_tokens[start:end]
+            if len(format_path_tokens(function)) > MAX_LENGTH:
+                break
 
-    # Make sure the last component we have is unique
-    if len(set(remaining_comonents)) > 1:
-        return None
+            res = find_functions(end, functions + [function], calls + [len(functions)])
+            if res is not None:
+                return res
 
-    last_component = dedup_path_string(remaining_comonents[0])
-    if len(last_component) > 20:
         return None
 
-    return last_component
-
-
-# Remove the given comopnent from the front and back of a string
-def remove_prefix_and_suffix(s: str, component: str) -> str:
-    res = s
-    if res.startswith(component):
-        res = res[len(component):].lstrip(',')
-    if res.endswith(component):
-        res = res[:-len(component)].rstrip(',')
-
-    return res
-
-
-# Find the three compressible components of the path
-# This is NOT pretty. This could be generalized by searching for all substrings, but that would be longer running
-def find_compressable_path_components(path: str) -> Tuple[str, str, str]:
-    MAX_LENGTH = 20
-    for i in range(MAX_LENGTH + 1):
-        path_candidate = path
-        # Find the first component at the start of the string
-        component1 = find_path_component(path_candidate, 0, i)
-        if component1 is None:
-            continue
-
-        # Remove it from both ends
-        path_candidate = remove_prefix_and_suffix(path_candidate, component1)
-        for j in range(MAX_LENGTH + 1):
-            trimmed_candidate = path_candidate
-            # We know there must be another unique component at the end of the string
-            component2 = find_path_component(trimmed_candidate, len(trimmed_candidate) - 1, -j)
-            if component2 is None:
-                continue
-
-            # Remove it from both ends
-            trimmed_candidate = remove_prefix_and_suffix(trimmed_candidate, component2)
-            component3 = get_last_path_component(trimmed_candidate, component1, component2)
-            if component3 is None:
-                continue
-
-            return component1, component2, component3
-    else:
+    res = find_functions(0, [], [])
+    if res is None:
         raise Exception("path is not compressible into three functions")
 
-
-# Convert a path into a list of functions based on the given function defintiions
-def make_function_nav_string(path: str, functions: Dict[str, str]) -> str:
-    i = 0
-    function_nav_string = []
-    while i < len(path):
-        for function_name, function in sorted(functions.items(), key=lambda x: len(x[1]), reverse=True):
-            if path[i:i+len(function)] == function:
-                function_nav_string.append(function_name)
-                # +1 for the comma
-                i += len(function) + 1
-                break
-        else:
-            raise ValueError('Functions not in path')
-
-    return ','.join(function_nav_string)
+    return res
 
 
 def part1(scaffold_graph: networkx.Graph) -> int:
@@ -448,19 +397,23 @@ def part2(initial_memory_state: Memory, scaffold_graph: networkx.Graph, robot_po
     def make_ascii_input(s: str) -> str:
         return [ord(char) for char in s]
 
-    nav_string = make_greedy_path(scaffold_graph, robot_pos)
-    functions = find_compressable_path_components(nav_string)
-    named_functions = {name: function for name, function in zip(['A', 'B', 'C'], functions)}
-    function_nav_string = make_function_nav_string(nav_string, named_functions)
+    FUNCTION_NAMES = ('A', 'B', 'C')
+    path_tokens = trace_greedy_path(scaffold_graph, robot_pos)
+    functions, calls = compress_path(path_tokens)
+    # Only now do we need the paths as strings, to give them to the robot
+    function_nav_string = ','.join(FUNCTION_NAMES[i] for i in calls)
+    function_strings = [format_path_tokens(function) for function in functions]
+    # The robot always expects three functions, even if we didn't need them all
+    function_strings += [''] * (len(FUNCTION_NAMES) - len(function_strings))
 
     # Start the sequence of the interacitve mode
     program_memory = initial_memory_state.copy()
     program_memory[0] = 2
     _, _, outputs = execute_program(program_memory, [
         *make_ascii_input(function_nav_string + '\n'),
-        *make_ascii_input(named_functions['A'] + '\n'),
-        *make_ascii_input(named_functions['B'] + '\n'),
-        *make_ascii_input(named_functions['C'] + '\n'),
+        *make_ascii_input(function_strings[0] + '\n'),
+        *make_ascii_input(function_strings[1] + '\n'),
+        *make_ascii_input(function_strings[2] + '\n'),
         *make_ascii_input('n\n')
     ])
 
@@ -5,6 +5,8 @@ import sys
 import enum
 import string
 import itertools
+import collections
+import heapq
 from dataclasses import dataclass
 from typing import Any, Iterable, Dict, Set, List, Tuple, Optional, FrozenSet
 
@@ -212,6 +214,84 @@ def find_shortest_path_cost(
     return best_cost
 
 
+# The distance from one node to a key, and the doors (as a bitmask of their keys) that must be open to get there
+@dataclass(frozen=True)
+class KeyRoute:
+    destination: Tuple[int, int]
+    key_bit: int
+    distance: int
+    required_doors: int
+
+
+def get_key_bit(char: str) -> int:
+    return 1 << (ord(char.lower()) - ord('a'))
+
+
+# Find the routes from every player and key to every key reachable from it. Doors that have no key anywhere in the
+# graph can never be opened, so we assume someone else will get them, and don't require them.
+def make_key_routes(graph: networkx.Graph) -> Dict[Tuple[int, int], List[KeyRoute]]:
+    infos = dict(graph.nodes.data('info'))
+    all_keys = 0
+    for info in infos.values():
+        if info.node_type == NodeType.KEY:
+            all_keys |= get_key_bit(info.char)
+
+    sources = [node for node, info in infos.items() if info.node_type in (NodeType.PLAYER, NodeType.KEY)]
+    routes = {}
+    for source in sources:
+        routes[source] = []
+        distances = {source: 0}
+        queue = collections.deque([(source, 0)])
+        while queue:
+            node, required_doors = queue.popleft()
+            info = infos[node]
+            if info.node_type == NodeType.DOOR and get_key_bit(info.char) & all_keys:
+                required_doors |= get_key_bit(info.char)
+            elif info.node_type == NodeType.KEY and node != source:
+                routes[source].append(KeyRoute(node, get_key_bit(info.char), distances[node], required_doors))
+
+            for neighbor in graph.neighbors(node):
+                if neighbor not in distances:
+                    distances[neighbor] = distances[node] + 1
+                    queue.append((neighbor, required_doors))
+
+    return routes
+
+
+# Find the shortest path to collect every key using Dijkstra's algorithm, where each state is the positions of all
+# players and a bitmask of the keys collected so far. Every player moves independently, so this works for part 2 too.
+def find_shortest_path_cost_bitmask(graph: networkx.Graph) -> int:
+    routes = make_key_routes(graph)
+    all_keys = 0
+    for source_routes in routes.values():
+        for route in source_routes:
+            all_keys |= route.key_bit
+
+    start_positions = tuple(node for node, info in graph.nodes.data('info') if info.node_type == NodeType.PLAYER)
+    best_costs = {(start_positions, 0): 0}
+    to_visit = [(0, start_positions, 0)]
+    while to_visit:
+        cost, positions, collected_keys = heapq.heappop(to_visit)
+        if collected_keys == all_keys:
+            return cost
+        elif cost > best_costs[(positions, collected_keys)]:
+            continue
+
+        for i, position in enumerate(positions):
+            for route in routes[position]:
+                if route.key_bit & collected_keys or route.required_doors & ~collected_keys:
+                    continue
+
+                new_positions = positions[:i] + (route.destination,) + positions[i + 1:]
+                new_state = (new_positions, collected_keys | route.key_bit)
+                new_cost = cost + route.distance
+                if new_cost < best_costs.get(new_state, math.inf):
+                    best_costs[new_state] = new_cost
+                    heapq.heappush(to_visit, (new_cost, *new_state))
+
+    raise ValueError('Not all keys can be collected')
+
+
 # Mark any doors within the graph that don't have paths as ignored
 def mark_unopenable_doors_as_ignored(graph: networkx.Graph):
     for node, data in graph.nodes.data('info'):
@@ -240,6 +320,14 @@ def part2(graph: networkx.Graph) -> int:
     return sum(find_shortest_path_cost(subgraph) for subgraph in subgraphs)
 
 
+def part1_bitmask(graph: networkx.Graph) -> int:
+    return find_shortest_path_cost_bitmask(graph)
+
+
+def part2_bitmask(graph: networkx.Graph) -> int:
+    return find_shortest_path_cost_bitmask(graph)
+
+
 # A debug function used to print the path as letters
 def print_readable_path(graph: networkx.Graph, path: Iterable[Tuple[int, int]]) -> None:
     print([graph.nodes[node]['info'].char for node in path])
@@ -265,6 +353,7 @@ if __name__ == "__main__":
 
     part1_graph = make_graph_from_input(input_lines)
     print(part1(part1_graph))
+    print(part1_bitmask(part1_graph))
 
     part2_input = input_lines
     num_players = sum(line.count('@') for line in input_lines)
@@ -273,3 +362,4 @@ if __name__ == "__main__":
 
     part2_graph = make_graph_from_input(part2_input)
     print(part2(part2_graph))
+    print(part2_bitmask(part2_graph))
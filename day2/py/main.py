@@ -1,12 +1,26 @@
 import itertools
+import multiprocessing
+
+DESIRED_OUTPUT = 19690720
+
+# The state for each worker in part2_parallel, set once when each worker starts: the program, which is shared
+# read-only between all of the workers, the worker's own scratch memory to run it in, and the cancellation signal
+_worker_program = None
+_worker_memory = None
+_worker_found = None
 
 
 def execute_program(inputs):
+    # Execute the program on a copy of the inputs, so we don't reuse the list
+    return run_program(inputs[:])
+
+
+# Run the program directly in the given memory, returning the value left at position 0
+def run_program(program_memory):
     TERMINATE_OPCODE = 99
     ADD_OPCODE = 1
     MULTIPLY_OPCODE = 2
 
-    program_memory = inputs[:]
     # Each instruction moves the instruction pointer forward by 4.
     # Iterate over the loop opcodes accordingly (stepping by 4)
     for i, opcode in itertools.islice(enumerate(program_memory), 0, None, 4):
@@ -30,6 +44,126 @@ def execute_program(inputs):
     return program_memory[0]
 
 
+# A polynomial in the noun and verb, stored as a mapping of (noun exponent, verb exponent) to coefficient
+class Polynomial:
+    def __init__(self, terms):
+        self.terms = {exponents: coefficient for exponents, coefficient in terms.items() if coefficient != 0}
+
+    @staticmethod
+    def wrap(value):
+        if isinstance(value, Polynomial):
+            return value
+
+        return Polynomial({(0, 0): value})
+
+    def __add__(self, other):
+        terms = self.terms.copy()
+        for exponents, coefficient in Polynomial.wrap(other).terms.items():
+            terms[exponents] = terms.get(exponents, 0) + coefficient
+
+        return Polynomial(terms)
+
+    def __mul__(self, other):
+        terms = {}
+        for (noun_a, verb_a), coefficient_a in self.terms.items():
+            for (noun_b, verb_b), coefficient_b in Polynomial.wrap(other).terms.items():
+                exponents = (noun_a + noun_b, verb_a + verb_b)
+                terms[exponents] = terms.get(exponents, 0) + coefficient_a * coefficient_b
+
+        return Polynomial(terms)
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+
+    def evaluate(self, noun, verb):
+        return sum(coefficient * noun**noun_exp * verb**verb_exp
+                   for (noun_exp, verb_exp), coefficient in self.terms.items())
+
+    # Get the coefficients of this polynomial in terms of the verb alone, once the noun is known
+    def coefficients_for_noun(self, noun):
+        coefficients = {}
+        for (noun_exp, verb_exp), coefficient in self.terms.items():
+            coefficients[verb_exp] = coefficients.get(verb_exp, 0) + coefficient * noun**noun_exp
+
+        return coefficients
+
+
+# Raised when the program can't be evaluated symbolically, such as when a write address depends on the noun or verb
+class NotSymbolicError(Exception):
+    pass
+
+
+# Marks a value that was read from an address depending on the noun or verb, so we can't know what it is.
+# This is fine, as long as it never ends up being used for anything that matters.
+UNKNOWN = object()
+
+
+# Execute the program with the noun and verb left as unknowns, returning memory[0] as a polynomial of them
+def execute_program_symbolically(inputs):
+    TERMINATE_OPCODE = 99
+    ADD_OPCODE = 1
+    MULTIPLY_OPCODE = 2
+
+    def is_known_int(value):
+        return value is not UNKNOWN and not isinstance(value, Polynomial)
+
+    def read(address):
+        if not is_known_int(address):
+            return UNKNOWN
+
+        return program_memory[address]
+
+    program_memory = inputs[:]
+    program_memory[1] = Polynomial({(1, 0): 1})
+    program_memory[2] = Polynomial({(0, 1): 1})
+    for i in range(0, len(program_memory), 4):
+        opcode = program_memory[i]
+        out_index = program_memory[i + 3] if i + 3 < len(program_memory) else None
+        # The opcode and the address we write to have to be known values, or we can't tell what the program will do
+        if not is_known_int(opcode):
+            raise NotSymbolicError('Opcode depends on the noun or verb')
+        elif opcode == TERMINATE_OPCODE:
+            break
+        elif not is_known_int(out_index):
+            raise NotSymbolicError('Write address depends on the noun or verb')
+        elif opcode == ADD_OPCODE:
+            operation = lambda a, b: a + b
+        elif opcode == MULTIPLY_OPCODE:
+            operation = lambda a, b: a * b
+        else:
+            raise Exception('Bad opcode: ' + str(opcode))
+
+        a = read(program_memory[i + 1])
+        b = read(program_memory[i + 2])
+        program_memory[out_index] = UNKNOWN if UNKNOWN in (a, b) else operation(a, b)
+
+    if program_memory[0] is UNKNOWN:
+        raise NotSymbolicError('Output depends on an unknown value')
+
+    return Polynomial.wrap(program_memory[0])
+
+
+# Find a noun and verb where the polynomial takes on the desired value
+def solve_polynomial(polynomial, desired_output):
+    for noun in range(100):
+        coefficients = polynomial.coefficients_for_noun(noun)
+        # If the output is linear in the verb, we can solve for it directly
+        if all(exponent <= 1 for exponent in coefficients):
+            constant = coefficients.get(0, 0)
+            slope = coefficients.get(1, 0)
+            if slope == 0:
+                if constant == desired_output:
+                    return noun, 0
+            elif (desired_output - constant) % slope == 0 and 0 <= (desired_output - constant) // slope < 100:
+                return noun, (desired_output - constant) // slope
+        else:
+            for verb in range(100):
+                if polynomial.evaluate(noun, verb) == desired_output:
+                    return noun, verb
+
+    return None
+
+
 def part1(inputs):
     inputs[1] = 12
     inputs[2] = 2
@@ -38,8 +172,6 @@ def part1(inputs):
 
 
 def part2(inputs):
-    DESIRED_OUTPUT = 19690720
-
     for i in range(100):
         for j in range(100):
             inputs[1] = i
@@ -52,9 +184,63 @@ def part2(inputs):
         raise Exception('Could not find result')
 
 
+def part2_symbolic(inputs):
+    try:
+        polynomial = execute_program_symbolically(inputs)
+    except NotSymbolicError:
+        return part2(inputs)
+
+    solution = solve_polynomial(polynomial, DESIRED_OUTPUT)
+    if solution is None:
+        raise Exception('Could not find result')
+
+    noun, verb = solution
+    return 100 * noun + verb
+
+
+def _init_search_worker(program, found):
+    global _worker_program, _worker_memory, _worker_found
+    _worker_program = program
+    _worker_memory = [0] * len(program)
+    _worker_found = found
+
+
+# Search all verbs for the given noun, stopping early if any other worker has found the answer
+def _search_noun(noun):
+    for verb in range(100):
+        if _worker_found.is_set():
+            return None
+
+        # The program writes to its memory as it runs, so the scratch memory has to be reset from the shared program
+        # before every run, but it's the same list every time
+        _worker_memory[:] = _worker_program
+        _worker_memory[1] = noun
+        _worker_memory[2] = verb
+        if run_program(_worker_memory) == DESIRED_OUTPUT:
+            _worker_found.set()
+            return 100 * noun + verb
+
+    return None
+
+
+def part2_parallel(inputs, processes=None):
+    found = multiprocessing.Event()
+    # Put the program in shared memory once, rather than giving every worker its own copy
+    program = multiprocessing.RawArray('q', inputs)
+    with multiprocessing.Pool(processes, initializer=_init_search_worker, initargs=(program, found)) as pool:
+        for result in pool.imap_unordered(_search_noun, range(100)):
+            if result is not None:
+                # Leaving the pool will terminate any workers that are still going
+                return result
+        else:
+            raise Exception('Could not find result')
+
+
 if __name__ == '__main__':
     with open('../input.txt') as f:
         inputs = [int(item) for item in f.read().rstrip().split(',')]
 
     print(part1(inputs))
     print(part2(inputs))
+    print(part2_parallel(inputs))
+    print(part2_symbolic(inputs))
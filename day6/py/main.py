@@ -1,7 +1,8 @@
 import collections
 import sys
+import time
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Callable
+from typing import List, Dict, Optional, Callable, Iterable, Iterator, TextIO, Tuple
 import math
 
 ROOT_NODE = 'COM'
@@ -16,54 +17,201 @@ class Node:
     children: List['Node']
     parent: 'Node'
 
+    # Get this node and all nodes underneath it, with every node coming before its children
+    def flatten(self) -> List['Node']:
+        nodes = []
+        # Use an explicit stack rather than recursion, so deep orbit chains don't hit the recursion limit
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            # Push the children backwards so that they are visited in order
+            stack.extend(reversed(node.children))
+
+        return nodes
+
     # Apply a function to this node and all nodes underneath it
     def apply_to_tree(self, f: Callable[['Node'], None]) -> None:
-        f(self)
-        for child in self.children:
-            child.apply_to_tree(f)
+        for node in self.flatten():
+            f(node)
 
     # Search for a node in the tree consisting of this node and all nodes underneath it
     def find(self, target_name: str) -> Optional['Node']:
-        # Find the target in the child list
-        for child in self.children:
-            if child.name == target_name:
-                return child
-
-        for child in self.children:
-            res = child.find(target_name)
-            if res is not None:
-                return res
-        else:
-            return None
+        # Search level by level, so that closer nodes are found first
+        queue = collections.deque(self.children)
+        while queue:
+            node = queue.popleft()
+            if node.name == target_name:
+                return node
+
+            queue.extend(node.children)
+
+        return None
 
 
 # Make a tree of orbits from the input dict, returning the root node (COM)
 def make_orbit_tree(raw_orbits: Dict[str, List[str]]) -> Node:
-    def add_item(node: Node, new_child: str):
+    root = Node(name=ROOT_NODE, depth=0, children=[], parent=None)
+    # Start with the root, adding its only child
+    to_add = [(root, raw_orbits[ROOT_NODE][0])]
+    while to_add:
+        node, new_child = to_add.pop()
         child_node = Node(name=new_child, depth=node.depth + 1, children=[], parent=node)
         node.children.append(child_node)
         # Process the orbits of the nodes that are orbiting this one
-        for subchild in raw_orbits[new_child]:
-            add_item(child_node, subchild)
-
-    root = Node(name=ROOT_NODE, depth=0, children=[], parent=None)
-    # Start with the root, adding its only child
-    add_item(root, raw_orbits[ROOT_NODE][0])
+        for subchild in reversed(raw_orbits[new_child]):
+            to_add.append((child_node, subchild))
 
     return root
 
 
 def part1(root: Node) -> int:
-    orbits = 0
+    # The flattened tree is in topological order, so every node's depth is final by the time we reach it
+    return sum(node.depth for node in root.flatten())
+
+
+# An array backed index of the orbit tree, where every body is given an integer id.
+# Ancestors are stored with binary lifting, so that the common ancestor of any two bodies is found in O(log n).
+class OrbitIndex:
+    def __init__(self, raw_orbits: Dict[str, List[str]]):
+        self.ids: Dict[str, int] = {ROOT_NODE: 0}
+        self.names: List[str] = [ROOT_NODE]
+        # The root is its own parent, which keeps the ancestor tables from ever going out of bounds
+        self.parents: List[int] = [0]
+        self.depths: List[int] = [0]
+
+        # Assign ids in breadth first order, so that every body's parent has an id before it does
+        queue = collections.deque([ROOT_NODE])
+        while queue:
+            name = queue.popleft()
+            parent_id = self.ids[name]
+            for orbiter in raw_orbits.get(name, []):
+                self.ids[orbiter] = len(self.names)
+                self.names.append(orbiter)
+                self.parents.append(parent_id)
+                self.depths.append(self.depths[parent_id] + 1)
+                queue.append(orbiter)
+
+        # ancestors[k][i] holds the 2^k-th ancestor of body i
+        self.ancestors: List[List[int]] = [self.parents]
+        for _ in range(max(self.depths).bit_length()):
+            previous = self.ancestors[-1]
+            self.ancestors.append([previous[ancestor] for ancestor in previous])
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def lookup(self, name: str) -> int:
+        try:
+            return self.ids[name]
+        except KeyError:
+            raise ValueError(f"{name} is not in the orbit map") from None
+
+    # Find the ancestor of the given body at the given depth
+    def _ancestor_at_depth(self, body_id: int, depth: int) -> int:
+        distance = self.depths[body_id] - depth
+        k = 0
+        while distance > 0:
+            if distance & 1:
+                body_id = self.ancestors[k][body_id]
+            distance >>= 1
+            k += 1
+
+        return body_id
 
-    # Go over all of the children, and add up their depths
-    def add_depth(node: Node):
-        nonlocal orbits
-        orbits += node.depth
+    # Find the lowest common ancestor of the two bodies
+    def common_ancestor(self, a_id: int, b_id: int) -> int:
+        depth = min(self.depths[a_id], self.depths[b_id])
+        a_id = self._ancestor_at_depth(a_id, depth)
+        b_id = self._ancestor_at_depth(b_id, depth)
+        if a_id == b_id:
+            return a_id
 
-    root.apply_to_tree(add_depth)
+        for level in reversed(self.ancestors):
+            if level[a_id] != level[b_id]:
+                a_id = level[a_id]
+                b_id = level[b_id]
 
-    return orbits
+        return self.parents[a_id]
+
+    # Get the number of transfers needed to go from the body the source orbits to the body the target orbits
+    def orbital_transfers(self, source: str, target: str) -> int:
+        source_id = self.parents[self.lookup(source)]
+        target_id = self.parents[self.lookup(target)]
+        ancestor_id = self.common_ancestor(source_id, target_id)
+
+        return self.depths[source_id] + self.depths[target_id] - 2 * self.depths[ancestor_id]
+
+
+# Answers orbital transfer queries against an OrbitIndex in O(1) each, by finding common ancestors with a
+# sparse table of minimum depths over an Euler tour of the tree
+class TransferQueryEngine:
+    def __init__(self, index: OrbitIndex):
+        self.index = index
+        children: List[List[int]] = [[] for _ in range(len(index))]
+        for body_id in range(1, len(index)):
+            children[index.parents[body_id]].append(body_id)
+
+        # Walk the tree, recording every body each time we pass through it
+        self.tour: List[int] = []
+        self.first_visit: List[int] = [0] * len(index)
+        stack = [(0, 0)]
+        while stack:
+            body_id, next_child = stack.pop()
+            if next_child == 0:
+                self.first_visit[body_id] = len(self.tour)
+            self.tour.append(body_id)
+            if next_child < len(children[body_id]):
+                stack.append((body_id, next_child + 1))
+                stack.append((children[body_id][next_child], 0))
+
+        # shallowest[k][i] holds the shallowest body in tour[i:i + 2^k]
+        self.shallowest: List[List[int]] = [self.tour]
+        width = 1
+        while width * 2 <= len(self.tour):
+            previous = self.shallowest[-1]
+            self.shallowest.append([
+                a if index.depths[a] <= index.depths[b] else b
+                for a, b in zip(previous, previous[width:])
+            ])
+            width *= 2
+
+    # Find the lowest common ancestor of the two bodies; this is the shallowest body between their first visits
+    def common_ancestor(self, a_id: int, b_id: int) -> int:
+        start, end = sorted((self.first_visit[a_id], self.first_visit[b_id]))
+        level = (end - start + 1).bit_length() - 1
+        a = self.shallowest[level][start]
+        b = self.shallowest[level][end - (1 << level) + 1]
+
+        return a if self.index.depths[a] <= self.index.depths[b] else b
+
+    # Get the number of transfers needed to go from the body the source orbits to the body the target orbits
+    def orbital_transfers(self, source: str, target: str) -> int:
+        source_id = self.index.parents[self.index.lookup(source)]
+        target_id = self.index.parents[self.index.lookup(target)]
+        ancestor_id = self.common_ancestor(source_id, target_id)
+
+        return self.index.depths[source_id] + self.index.depths[target_id] - 2 * self.index.depths[ancestor_id]
+
+    # Answer all of the given (source, target) queries, returning the answers and the rate they were answered at
+    def answer_all(self, queries: Iterable[Tuple[str, str]]) -> Tuple[List[int], float]:
+        start_time = time.perf_counter()
+        answers = [self.orbital_transfers(source, target) for source, target in queries]
+        elapsed = time.perf_counter() - start_time
+
+        return answers, len(answers) / elapsed if elapsed > 0 else math.inf
+
+
+# Read (source, target) queries from a stream, with one whitespace separated pair per line
+def read_transfer_queries(stream: TextIO) -> Iterator[Tuple[str, str]]:
+    for line in stream:
+        parts = line.split()
+        if not parts:
+            continue
+        elif len(parts) != 2:
+            raise ValueError(f"Invalid query '{line.rstrip()}'")
+
+        yield parts[0], parts[1]
 
 
 # Search the tree using Dikjstra's algorithm (BFS probably would have been more apt, but this works)
@@ -101,7 +249,7 @@ def part2(root: Node):
 
         del unvisited[cursor_node.name]
         # If we've used our target, we're done.
-        if cursor_node == target_node:
+        if cursor_node is target_node:
             break
 
         # Get the next cursor
@@ -116,8 +264,8 @@ def part2(root: Node):
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: ./main.py in_file")
+    if len(sys.argv) not in (2, 3):
+        print("Usage: ./main.py in_file [query_file]")
         sys.exit(1)
 
     with open(sys.argv[1]) as f:
@@ -129,6 +277,22 @@ if __name__ == "__main__":
         orbiting, orbiter = item.split(")")
         raw_orbits[orbiting].append(orbiter)
 
+    # Answer a batch of queries rather than solving the puzzle, if we've been given them ('-' reads from stdin)
+    if len(sys.argv) == 3:
+        engine = TransferQueryEngine(OrbitIndex(raw_orbits))
+        if sys.argv[2] == '-':
+            queries = list(read_transfer_queries(sys.stdin))
+        else:
+            with open(sys.argv[2]) as f:
+                queries = list(read_transfer_queries(f))
+
+        answers, queries_per_second = engine.answer_all(queries)
+        for (source, target), answer in zip(queries, answers):
+            print(f"{source} {target} {answer}")
+        print(f"Answered {len(answers)} queries ({queries_per_second:.0f} queries/s)", file=sys.stderr)
+        sys.exit(0)
+
     root = make_orbit_tree(raw_orbits)
     print(part1(root))
     print(part2(root))
+    print(OrbitIndex(raw_orbits).orbital_transfers(YOU_NODE, TARGET_NODE))
@@ -1,6 +1,10 @@
+import mmap
 import sys
+import numpy
 from typing import Tuple
 
+TRANSPARENT = 2
+
 
 def make_layers(input: Tuple[int], width: int, height: int) -> Tuple[Tuple[int]]:
     layers = []
@@ -46,6 +50,83 @@ def part2(layers: Tuple[Tuple[str]], width: int, height: int) -> int:
         print('')
 
 
+# Load the image as an array of digits, shaped as (layers, height, width)
+def load_image(path: str, width: int, height: int) -> numpy.ndarray:
+    with open(path, 'rb') as f:
+        digits = numpy.frombuffer(f.read().strip(), dtype=numpy.uint8) - ord('0')
+
+    num_layers = len(digits) // (height * width)
+
+    return digits[:num_layers * height * width].reshape(num_layers, height, width)
+
+
+# Find the visible pixels of the image, being the first pixel in each stack that isn't transparent
+def stack_image(image: numpy.ndarray) -> numpy.ndarray:
+    opaque = image != TRANSPARENT
+    # argmax finds the first True along the layer axis, but gives 0 if there are none, so those need to be blanked
+    first_opaque = numpy.argmax(opaque, axis=0)
+    visible = numpy.take_along_axis(image, first_opaque[numpy.newaxis], axis=0)[0]
+
+    return numpy.where(opaque.any(axis=0), visible, 0)
+
+
+def part1_numpy(image: numpy.ndarray) -> int:
+    zero_counts = numpy.count_nonzero(image == 0, axis=(1, 2))
+    fewest_zero_layer = image[numpy.argmin(zero_counts)]
+
+    return int(numpy.count_nonzero(fewest_zero_layer == 1) * numpy.count_nonzero(fewest_zero_layer == 2))
+
+
+def print_visible_image(visible: numpy.ndarray) -> None:
+    for row in visible:
+        print(' '.join('#' if pixel == 1 else ' ' for pixel in row) + ' ')
+
+
+def part2_numpy(image: numpy.ndarray) -> None:
+    print_visible_image(stack_image(image))
+
+
+# Decode an image from a memory mapped file one layer at a time, so that only the running composite and the
+# current layer are ever in memory. Returns the part 1 checksum and the visible image.
+def decode_streaming(path: str, width: int, height: int) -> Tuple[int, numpy.ndarray]:
+    layer_size = width * height
+    composite = numpy.full((height, width), TRANSPARENT, dtype=numpy.uint8)
+    fewest_zeros = None
+    checksum = None
+    with open(path, 'rb') as f:
+        # mmap can't map an empty file, and an empty file has no layers anyway
+        if f.seek(0, 2) == 0:
+            return checksum, numpy.zeros((height, width), dtype=numpy.uint8)
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            # Skip past any leading whitespace. Any trailing whitespace is shorter than a layer, so it will be dropped.
+            start = 0
+            while start < len(mapped) and mapped[start:start + 1].isspace():
+                start += 1
+
+            num_layers = (len(mapped) - start) // layer_size
+            for i in range(num_layers):
+                raw = numpy.frombuffer(mapped, dtype=numpy.uint8, count=layer_size, offset=start + i * layer_size)
+                layer = (raw - ord('0')).reshape(height, width)
+
+                zeros = numpy.count_nonzero(layer == 0)
+                if fewest_zeros is None or zeros < fewest_zeros:
+                    fewest_zeros = zeros
+                    checksum = int(numpy.count_nonzero(layer == 1) * numpy.count_nonzero(layer == 2))
+
+                # Anything still transparent can be seen through to this layer
+                numpy.copyto(composite, layer, where=composite == TRANSPARENT)
+
+            # raw is a view into the mapping, so it must be released before the mapping can be closed
+            if num_layers > 0:
+                del raw
+
+    # Pixels that are transparent all the way through are shown as black
+    composite[composite == TRANSPARENT] = 0
+
+    return checksum, composite
+
+
 if __name__ == "__main__":
     if len(sys.argv) != 4:
         print("Usage: ./main.py in_file width height")
@@ -62,3 +143,15 @@ if __name__ == "__main__":
     print(part1(layers))
     print("PART 2")
     part2(layers, width, height)
+
+    image = load_image(sys.argv[1], width, height)
+    print("PART 1 (NUMPY)")
+    print(part1_numpy(image))
+    print("PART 2 (NUMPY)")
+    part2_numpy(image)
+
+    checksum, visible = decode_streaming(sys.argv[1], width, height)
+    print("PART 1 (STREAMING)")
+    print(checksum)
+    print("PART 2 (STREAMING)")
+    print_visible_image(visible)